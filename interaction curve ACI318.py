@@ -8,6 +8,106 @@ import numpy as np
 import matplotlib.pylab as plt
 
 
+def _steel_stress(eps, E, f_sy):
+    """
+    elasto-plastic stress for the steel bars, the elastic stress bounded by the yield strength
+    :param eps: (ndarray) deformation for each steel bar
+    :param E: elastic module of the steel
+    :param f_sy: yield strength of the steel
+    :return: (ndarray) stress for each steel bar
+    """
+    return np.clip(E * eps, -f_sy, f_sy)
+
+
+def _phi_aci(eps_t, eps_sy):
+    """
+    reduction of resistance factor defined in ACI318-14 code
+    :param eps_t: (ndarray) net tensile deformation of the extreme tension steel, positive in tension
+    :param eps_sy: yield deformation of the steel
+    :return: (ndarray) reduction factor
+    """
+    # 0.65 up to yielding (compression controlled), 0.9 from 0.005 and a linear transition between them
+    return 0.65 + 0.25 * np.clip((eps_t - eps_sy) / (0.005 - eps_sy), 0.0, 1.0)
+
+
+def _build_curve(bars_pos, areas, b, h, E, f_sy, eps_sy, eps_cu, fc, alpha, beta, c):
+    """
+    this routine calculate the nominal and design points of the interaction curve using plain arrays and floats
+    the section properties may be floats or arrays of shape (K,) to compute K sections at once
+    :param bars_pos: (ndarray) position of each steel bars line w/r to the section center, shape (Nb,) or (K, Nb)
+    :param areas: (ndarray) steel area of each line, shape (Nb,) or (K, Nb)
+    :param eps_sy: yield deformation of the steel, f_sy / E
+    :param c: (ndarray) increasing neutral axis depths swept in each part of the curve, shape (Nc,) or (K, Nc)
+    :return: (tuple) pn, mn, phi_pn, phi_mn with shape (2 * Nc + 3,) or (K, 2 * Nc + 3)
+    """
+    b, h, E, f_sy, eps_sy, eps_cu, fc, alpha, beta = (np.asarray(x, dtype=np.float64)
+                                                      for x in (b, h, E, f_sy, eps_sy, eps_cu, fc, alpha, beta))
+    block = alpha * beta * fc * b  # rectangular block force per unit depth
+    n_c = c.shape[-1]
+    n_points = 2 * n_c + 3
+    batch_shape = np.broadcast_shapes(b.shape, h.shape, E.shape, f_sy.shape, eps_sy.shape, eps_cu.shape, fc.shape,
+                                      alpha.shape, beta.shape, bars_pos.shape[:-1], areas.shape[:-1], c.shape[:-1])
+    pn = np.empty(batch_shape + (n_points,))
+    mn = np.empty(batch_shape + (n_points,))
+    phi_pn = np.empty(batch_shape + (n_points,))
+    phi_mn = np.empty(batch_shape + (n_points,))
+    pos = slice(1, 1 + n_c)  # positive part of the curve
+    k_comp = 1 + n_c  # pure compression point
+    neg = slice(2 + n_c, n_points - 1)  # negative part of the curve
+    # section properties against the depth axis and against the (depth, bar line) axes
+    h_c, beta_c, eps_cu_c, block_c, eps_sy_c = (x[..., None] for x in (h, beta, eps_cu, block, eps_sy))
+    half_h_cb, E_cb, f_sy_cb = (x[..., None, None] for x in (h / 2, E, f_sy))
+    bp = bars_pos[..., None, :]
+
+    def _sweep(c_vals, areas_vec, sign_m):
+        """
+        points for a sweep of the neutral axis, one row per depth and one column per bar line
+        :param c_vals: (ndarray) neutral axis depths
+        :param areas_vec: (ndarray) steel area of each line, ordered from the most tensioned one
+        :param sign_m: sign of the moment for this part of the curve
+        :return: (tuple) pn, mn, phi_pn, phi_mn
+        """
+        # quantities depending only on the depth, one value per depth
+        ycc = (h_c - beta_c * c_vals) / 2  # position of the steel level w/r to neutral axis
+        phi = eps_cu_c / c_vals
+        # concrete force using the rectangular block
+        Cc = block_c * c_vals
+        c_col = c_vals[..., None]
+        # with d = h - rec the level of each bar line w/r to the neutral axis reduces to bars_pos + c - h / 2
+        eps_s = phi[..., None] * (c_col - half_h_cb + bp)  # deformation of each bar line
+        fs = _steel_stress(eps_s, E_cb, f_sy_cb) * areas_vec[..., None, :]  # force in each bar line
+        phi_design = _phi_aci(-np.min(eps_s, axis=-1), eps_sy_c)  # extreme tension bar line
+        p = Cc + np.sum(fs, axis=-1)
+        m = sign_m * (Cc * ycc + np.einsum('...ij,...j->...i', fs, bars_pos)) / 100
+        return p, m, phi_design * p, phi_design * m
+
+    # pure traction considering non compressive resistance for steel, all bar lines share the same deformation
+    eps_t = -0.005
+    fs_t = _steel_stress(eps_t, E[..., None], f_sy[..., None]) * areas  # force in each bar line
+    phi_t = _phi_aci(-eps_t, eps_sy)
+    pn[..., 0] = np.sum(fs_t, axis=-1)
+    mn[..., 0] = np.einsum('...j,...j->...', bars_pos, fs_t) / 100
+    phi_pn[..., 0] = phi_t * pn[..., 0]
+    phi_mn[..., 0] = phi_t * mn[..., 0]
+    # positive part of the curve
+    pn[..., pos], mn[..., pos], phi_pn[..., pos], phi_mn[..., pos] = _sweep(c, areas, 1)
+    # pure compression, the concrete resultant acts at the section center
+    fs = _steel_stress(eps_cu[..., None], E[..., None], f_sy[..., None]) * areas  # force in each bar line
+    phi_design = _phi_aci(-eps_cu, eps_sy)
+    pn[..., k_comp] = alpha * fc * b * h + np.sum(fs, axis=-1)
+    mn[..., k_comp] = np.einsum('...j,...j->...', bars_pos, fs) / 100
+    phi_pn[..., k_comp] = phi_design * pn[..., k_comp]
+    phi_mn[..., k_comp] = phi_design * mn[..., k_comp]
+    # negative part of the curve, same sweep mirrored: reversed steel lines and decreasing depths
+    pn[..., neg], mn[..., neg], phi_pn[..., neg], phi_mn[..., neg] = _sweep(c[..., ::-1], areas[..., ::-1], -1)
+    # pure tension, the pure traction forces acting on the reversed steel lines
+    pn[..., -1] = pn[..., 0]
+    mn[..., -1] = -np.einsum('...j,...j->...', bars_pos, fs_t[..., ::-1]) / 100
+    phi_pn[..., -1] = phi_t * pn[..., -1]
+    phi_mn[..., -1] = phi_t * mn[..., -1]
+    return pn, mn, phi_pn, phi_mn
+
+
 class StructuralElement:
 
     def __init__(self, parameters):
@@ -15,6 +115,7 @@ class StructuralElement:
         self.h = parameters['high']
         self.E = parameters['elastic_module']
         self.f_sy = parameters['yield_strength']
+        self.eps_sy = self.f_sy / self.E
         self.eps_cu = parameters['ultimate_deformation_concrete']
         self.fc = parameters['concrete_compressive_stress']
         self.alpha = parameters['alpha']
@@ -28,139 +129,52 @@ class StructuralElement:
 
     def steel_constitutive_relation(self, eps):
         """
-        this routine determine the stress for a bar using an elasto-plastic constitutive relation
-        :param eps: deformation for an steel bar
-        :return:
+        this routine determine the stress for the bars using an elasto-plastic constitutive relation
+        :param eps: (ndarray) deformation for each steel bar
+        :return: (ndarray) stress for each steel bar
         """
-        eps_sy = self.f_sy / self.E
-        if abs(eps) <= eps_sy:
-            fs = self.E * eps
-        else:
-            if eps < 0:
-                fs = -self.f_sy
-            else:
-                fs = self.f_sy
-        return fs
-
-    def phi_aci(self, eps):
+        return _steel_stress(eps, self.E, self.f_sy)
+
+    def phi_aci(self, eps_t):
         """
         this routine gives the value for reduction of resistance factor defined in ACI318-14 code
-        :param eps: deformation for an steel bar
-        :return:
+        :param eps_t: (ndarray) net tensile deformation of the extreme tension steel, positive in tension
+        :return: (ndarray) reduction factor
         """
-        eps = abs(eps)
-        eps_sy = self.f_sy / self.E
-        phi = 0
-        if eps <= eps_sy:
-            phi = 0.65
-        elif eps >= eps_sy and eps <= 0.005:
-            phi = 0.65 + 0.25 * (eps - eps_sy) / (0.005 - eps_sy)
-        elif eps >= 0.005:
-            phi = 0.9
-        return phi
+        return _phi_aci(eps_t, self.eps_sy)
 
     def incorporate_bars(self, bars_per_line, bars_diameter):
         """
         this routine determine the position of each steel bars line in the section assuming uniforming distribution
-        :param bars_per_line: (list) number of bars in each line
-        :param bars_diameter: (list) diameters for bars in each line
+        for K sections the layouts may be given per section with shape (K, Nb), all with the same Nb lines
+        :param bars_per_line: (list or ndarray) number of bars in each line, shape (Nb,) or (K, Nb)
+        :param bars_diameter: (list or ndarray) diameters for bars in each line, shape (Nb,) or (K, Nb)
         :return: None
         """
         self.bars_position = np.linspace(- (self.h - 2. * self.rec) / 2, (self.h - 2. * self.rec) / 2,
-                                         len(bars_per_line))
-        self.steel_area = []
-        for i in range(len(bars_per_line)):
-            self.steel_area.append(bars_per_line[i] * float(1 / 4) * np.pi * bars_diameter[i] ** 2)
+                                         np.shape(bars_per_line)[-1], axis=-1)
+        self.steel_area = (0.25 * np.pi) * np.asarray(bars_per_line, dtype=np.float64) * \
+            np.asarray(bars_diameter, dtype=np.float64) ** 2
 
     def get_interaction_curve(self):
         """
         this routine calculate the interaction curve and design curve using the ACI318-14 considerations for the element
+        both curves are stored as (mn, pn) tuples of ndarrays with 2 * n_c + 3 points, where n_c is the number of
+        neutral axis depths swept in each part of the curve, when the parameters of the element are arrays of
+        shape (K,) or the bars are given per section the K sections are computed at once and each curve array has
+        shape (K, 2 * n_c + 3)
         :return: None
         """
 
-        c = np.linspace(1E-8, self.h, 40)
-        fs = np.zeros([len(self.bars_position)])
-        pn = []
-        mn = []
-        phi_mn = []
-        phi_pn = []
-        # pure traction considering non compressive resistance for steel
-        Cc = 0
-        ycc = 0
-        for j in range(len(self.bars_position)):
-            eps_s = -0.005
-            force_steel = self.steel_constitutive_relation(eps_s)  # stress in lines
-            fs[j] = force_steel * self.steel_area[j]  # force in bars line
-            phi_design = self.phi_aci(eps_s)
-        pn.append((Cc + np.sum(fs)))
-        mn.append((Cc * ycc + np.sum(self.bars_position * fs)) / 100)
-        phi_pn.append(phi_design * (Cc + np.sum(fs)))
-        phi_mn.append(phi_design * (Cc * ycc + np.sum(self.bars_position * fs)) / 100)
-        # positive part of the curve
-        for i in range(len(c)):
-            ycc = (self.h - self.beta * c[i]) / 2  # position of the steel level w/r to neutral axis
-            phi = self.eps_cu / c[i]
-            # concrete force using the rectangular block
-            Cc = self.alpha * self.beta * self.fc * self.b * c[i]
-            for j in range(len(self.bars_position)):
-                ys_p = self.h / 2 + self.bars_position[j] - (self.d - c[i]) - self.rec
-                eps_s = phi * ys_p  # deformation of each bar in line i
-                force_steel = self.steel_constitutive_relation(eps_s)  # stress in line i
-                fs[j] = force_steel * self.steel_area[j]  # force in line i
-                phi_design = self.phi_aci(eps_s)
-            pn.append((Cc + np.sum(fs)))
-            mn.append((Cc * ycc + np.sum(self.bars_position * fs)) / 100)
-            phi_pn.append(phi_design * (Cc + np.sum(fs)))
-            phi_mn.append(phi_design * (Cc * ycc + np.sum(self.bars_position * fs)) / 100)
-        # pure compression
-        Cc = self.alpha * self.fc * self.b * self.h
-        ycc = 0
-        for j in range(len(self.bars_position)):
-            eps_s = self.eps_cu  # deformation of each bar in line i
-            force_steel = self.steel_constitutive_relation(eps_s)  # stress in lines
-            fs[j] = force_steel * self.steel_area[j]  # force in line i
-            phi_design = self.phi_aci(eps_s)
-        pn.append((Cc + np.sum(fs)))
-        mn.append((Cc * ycc + np.sum(self.bars_position * fs)) / 100)
-        phi_pn.append(phi_design * (Cc + np.sum(fs)))
-        phi_mn.append(phi_design * (Cc * ycc + np.sum(self.bars_position * fs)) / 100)
-        # negative part of the curve
-        self.steel_area.reverse()
-        c = np.linspace(self.h, 1E-8, 40)
-        for i in range(len(c)):
-            # concrete force using the rectangular block
-            Cc = self.alpha * self.beta * self.fc * self.b * c[i]
-            ycc = (self.h - self.beta * c[i]) / 2  # position of the steel level w/r to neutral axis
-            phi = self.eps_cu / c[i]
-            for j in range(len(self.bars_position)):
-                ys_p = self.h / 2 + self.bars_position[j] - (self.d - c[i]) - self.rec
-                eps_s = phi * ys_p  # deformation of each bar in line i
-                force_steel = self.steel_constitutive_relation(eps_s)  # stress in line i
-                fs[j] = force_steel * self.steel_area[j]  # force in line i
-                phi_design = self.phi_aci(eps_s)
-            pn.append((Cc + np.sum(fs)))
-            mn.append(-(Cc * ycc + np.sum(self.bars_position * fs)) / 100)
-            phi_pn.append(phi_design * (Cc + np.sum(fs)))
-            phi_mn.append(-phi_design * (Cc * ycc + np.sum(self.bars_position * fs)) / 100)
-        # pure tension
-        Cc = 0
-        for j in range(len(self.bars_position)):
-            eps_s = -0.005  # deformation of each bar in line i
-            force_steel = self.steel_constitutive_relation(eps_s)  # stress in lines
-            fs[j] = force_steel * self.steel_area[j]  # force in line i
-            phi_design = self.phi_aci(eps_s)
-        pn.append((Cc + np.sum(fs)))
-        mn.append(-(Cc * ycc + np.sum(self.bars_position * fs)) / 100)
-        phi_pn.append(phi_design * (Cc + np.sum(fs)))
-        phi_mn.append(-phi_design * (Cc * ycc + np.sum(self.bars_position * fs)) / 100)
+        n_c = 40
+        pn, mn, phi_pn, phi_mn = _build_curve(self.bars_position, self.steel_area,
+                                              self.b, self.h, self.E, self.f_sy, self.eps_sy, self.eps_cu, self.fc,
+                                              self.alpha, self.beta, np.linspace(1E-8, self.h, n_c, axis=-1))
         # maximum compressive resistance criteria
-        p_max = 0.80 * np.max(pn)
+        p_max = 0.80 * pn.max(axis=-1, keepdims=True)
         phip_max = 0.65 * p_max
-        for i in range(len(pn)):
-            if pn[i] >= p_max:
-                pn[i] = p_max
-            if phi_pn[i] >= phip_max:
-                phi_pn[i] = phip_max
+        np.minimum(pn, p_max, out=pn)
+        np.minimum(phi_pn, phip_max, out=phi_pn)
         self.interaction_curve = (mn, pn)
         self.design_curve = (phi_mn, phi_pn)
 
@@ -169,30 +183,31 @@ class StructuralElement:
 Execution
 """
 
-parameters = {'width': 80.0,
-              'high': 80.0,
-              'elastic_module': 2100.0,
-              'yield_strength': 4.2,
-              'ultimate_deformation_concrete': 0.003,
-              'concrete_compressive_stress': 0.250,
-              'alpha': 0.85,
-              'beta': 0.85,
-              'covering': 5.0}
-
-number_of_steel_lines = 4
-
-bars = {'bars_per_line': [4] * number_of_steel_lines,
-        'bars_diameter': [2.5] * number_of_steel_lines}
-column1 = StructuralElement(parameters=parameters)
-column1.incorporate_bars(bars_per_line=bars['bars_per_line'], bars_diameter=bars['bars_diameter'])
-column1.get_interaction_curve()
-
-plt.figure()
-plt.title('Interaction curve')
-plt.xlabel('$M_{n}[tonf - m ]$')
-plt.ylabel('$P_{n} [tonf]$')
-plt.plot(column1.interaction_curve[0], column1.interaction_curve[1], 'k', label='interaction curve ACI318-14')
-plt.plot(column1.design_curve[0], column1.design_curve[1], 'r', label='design curve ACI318-14')
-plt.grid()
-plt.legend(loc=1)
-plt.show()
+if __name__ == "__main__":
+    parameters = {'width': 80.0,
+                  'high': 80.0,
+                  'elastic_module': 2100.0,
+                  'yield_strength': 4.2,
+                  'ultimate_deformation_concrete': 0.003,
+                  'concrete_compressive_stress': 0.250,
+                  'alpha': 0.85,
+                  'beta': 0.85,
+                  'covering': 5.0}
+
+    number_of_steel_lines = 4
+
+    bars = {'bars_per_line': [4] * number_of_steel_lines,
+            'bars_diameter': [2.5] * number_of_steel_lines}
+    column1 = StructuralElement(parameters=parameters)
+    column1.incorporate_bars(bars_per_line=bars['bars_per_line'], bars_diameter=bars['bars_diameter'])
+    column1.get_interaction_curve()
+
+    plt.figure()
+    plt.title('Interaction curve')
+    plt.xlabel('$M_{n}[tonf - m ]$')
+    plt.ylabel('$P_{n} [tonf]$')
+    plt.plot(column1.interaction_curve[0], column1.interaction_curve[1], 'k', label='interaction curve ACI318-14')
+    plt.plot(column1.design_curve[0], column1.design_curve[1], 'r', label='design curve ACI318-14')
+    plt.grid()
+    plt.legend(loc=1)
+    plt.show()